@@ -4,10 +4,11 @@ import os
 from typing import Dict, Any
 
 # Third-party
-from dotenv import load_dotenv, find_dotenv
+from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv(find_dotenv())
+# Load environment variables (без find_dotenv: обход дерева каталогов
+# со stat на каждый уровень не нужен, .env лежит рядом с сервером)
+load_dotenv(os.getenv("FSTEC_DOTENV", ".env"), override=False)
 
 from fastmcp import FastMCP, Context
 from opentelemetry import trace
@@ -27,11 +28,33 @@ tracer = trace.get_tracer(__name__)
 def init_tracing():
     """Инициализация OpenTelemetry для трейсинга."""
     from opentelemetry.sdk.trace import TracerProvider
-    from opentelemetry.sdk.trace.export import SimpleSpanProcessor, ConsoleSpanExporter
-    
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
     provider = TracerProvider()
-    processor = SimpleSpanProcessor(ConsoleSpanExporter())
-    provider.add_span_processor(processor)
+
+    # В проде (задан OTEL_EXPORTER_OTLP_ENDPOINT) шлём спаны коллектору
+    # по gRPC: protobuf + HTTP/2 вместо JSON в stdout под блокировкой
+    exporter = None
+    otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if otlp_endpoint:
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter(endpoint=otlp_endpoint)
+        except ImportError:
+            print("⚠️ OTLP-экспортер не установлен (extra 'otlp'), трейсинг отключен")
+    elif os.getenv("OTEL_CONSOLE_EXPORTER"):
+        # Консольный экспортер включается явно — по умолчанию спаны не пишем
+        exporter = ConsoleSpanExporter()
+
+    if exporter is not None:
+        # BatchSpanProcessor пишет спаны фоновым потоком и не блокирует
+        # запрос на каждом завершении спана, в отличие от SimpleSpanProcessor
+        processor = BatchSpanProcessor(
+            exporter,
+            max_export_batch_size=512,
+            schedule_delay_millis=5000,
+        )
+        provider.add_span_processor(processor)
     trace.set_tracer_provider(provider)
 
 
@@ -41,6 +64,12 @@ def init_data():
     
     try:
         loader = FSTECDataLoader.get_instance(VULLIST_PATH)
+        # Прогреваем индексы и кеши, чтобы первый запрос их не строил
+        loader.warmup()
+        # Отдаём загрузчик обработчикам, минуя get_instance() на каждый запрос
+        from tools import search_vulnerabilities, get_vulnerability_details
+        search_vulnerabilities._LOADER = loader
+        get_vulnerability_details._LOADER = loader
         print(f"📊 База данных успешно загружена в память")
         return True
     except FileNotFoundError as e:
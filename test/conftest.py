@@ -0,0 +1,16 @@
+"""Общие фикстуры для тестов FSTEC MCP сервера."""
+import os
+import sys
+
+import pytest
+
+# Добавляем корень проекта в path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def preload_modules():
+    """Импортирует тяжёлые модули один раз на всю сессию тестов."""
+    import tools.utils  # noqa: F401
+    import tools.search_vulnerabilities  # noqa: F401
+    import tools.get_vulnerability_details  # noqa: F401
@@ -202,12 +202,11 @@ class TestErrorHandling:
     
     def test_file_not_found_handling(self):
         """Тест обработки отсутствия файла."""
-        from tools.utils import FSTECDataLoader
-        
-        # Сбрасываем singleton
-        FSTECDataLoader._instance = None
-        FSTECDataLoader._df = None
-        
+        from tools.utils import FSTECDataLoader, _load_fstec
+
+        # Сбрасываем кеш загрузчика
+        _load_fstec.cache_clear()
+
         with pytest.raises(FileNotFoundError) as exc_info:
             FSTECDataLoader.get_instance("nonexistent.xlsx")
         
@@ -112,6 +112,41 @@ class TestFSTECDataLoaderSearch:
         
         assert len(results) == 3
     
+    def test_search_version_in_comma_list(self, sample_dataframe):
+        """Тест поиска версии внутри списка версий через запятую."""
+        from tools.utils import FSTECDataLoader
+
+        df = sample_dataframe.copy()
+        df.loc[2, 'Версия ПО'] = '2.4.0, 2.4.1, 2.4.2'
+
+        loader = FSTECDataLoader()
+        loader._df = df
+
+        # Версия из середины списка: вхождение "2.4.1," не должно теряться
+        results = loader.search("2.4.1", limit=10)
+        assert len(results) == 1
+        assert results.iloc[0]['Идентификатор'] == 'BDU:2024-00003'
+
+        # Составной запрос с версией-префиксом работает как подстрока
+        results = loader.search("apache 2.4", limit=10)
+        assert len(results) == 1
+
+    def test_search_limit_clamped(self, sample_dataframe):
+        """Тест ограничения limit верхней и нижней границей."""
+        from tools.utils import FSTECDataLoader
+
+        # Добавляем больше записей nginx
+        extended_df = pd.concat([sample_dataframe] * 100, ignore_index=True)
+
+        loader = FSTECDataLoader()
+        loader._df = extended_df
+
+        results = loader.search("nginx", limit=100000)
+        assert len(results) == FSTECDataLoader.MAX_SEARCH_LIMIT
+
+        results = loader.search("nginx", limit=0)
+        assert len(results) == 1
+
     def test_search_in_description(self, sample_dataframe):
         """Тест поиска в описании уязвимости."""
         from tools.utils import FSTECDataLoader
@@ -175,14 +210,56 @@ class TestFSTECDataLoaderGetById:
         assert result is None
 
 
+class TestFSTECDataLoaderParquetCache:
+    """Тесты parquet-кеша загрузчика."""
+
+    @staticmethod
+    def _write_xlsx(path, sample_dataframe):
+        """Записывает xlsx в формате vullist: 3 строки заголовков, без имён колонок."""
+        sample_dataframe.to_excel(path, header=False, index=False, startrow=3)
+
+    def test_cache_round_trip(self, tmp_path, sample_dataframe):
+        """Тест повторной загрузки через parquet-кеш."""
+        from tools.utils import FSTECDataLoader
+
+        xlsx = str(tmp_path / "vullist.xlsx")
+        self._write_xlsx(xlsx, sample_dataframe)
+
+        first = FSTECDataLoader()
+        first._load_data(xlsx)
+        assert os.path.exists(xlsx + ".parquet")
+
+        second = FSTECDataLoader()
+        second._load_data(xlsx)
+
+        pd.testing.assert_frame_equal(first.dataframe, second.dataframe)
+        assert len(second.search("nginx", limit=10)) == 2
+        assert second.get_by_id("BDU:2024-00001") is not None
+
+    def test_cache_stale_after_xlsx_update(self, tmp_path, sample_dataframe):
+        """Тест устаревания кеша при обновлении xlsx."""
+        from tools.utils import FSTECDataLoader
+
+        xlsx = str(tmp_path / "vullist.xlsx")
+        cache = xlsx + ".parquet"
+        self._write_xlsx(xlsx, sample_dataframe)
+
+        FSTECDataLoader()._load_data(xlsx)
+        assert FSTECDataLoader._read_parquet_cache(cache, xlsx) is not None
+
+        # xlsx стал новее кеша — кеш должен игнорироваться
+        newer = os.path.getmtime(cache) + 10
+        os.utime(xlsx, (newer, newer))
+        assert FSTECDataLoader._read_parquet_cache(cache, xlsx) is None
+
+
 class TestFSTECDataLoaderSingleton:
-    """Тесты паттерна singleton."""
-    
+    """Тесты кеширования загрузчика."""
+
     def setup_method(self):
-        """Сброс singleton перед каждым тестом."""
-        from tools.utils import FSTECDataLoader
-        FSTECDataLoader._instance = None
-        FSTECDataLoader._df = None
+        """Сброс кеша загрузчика перед каждым тестом."""
+        from tools.utils import _load_fstec
+        _load_fstec.cache_clear()
     
     def test_file_not_found(self):
         """Проверка ошибки при отсутствии файла."""
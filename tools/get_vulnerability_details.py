@@ -1,14 +1,28 @@
 """Инструмент получения детальной информации об уязвимости ФСТЭК."""
+import contextlib
+from typing import Optional
+
 from fastmcp import Context
 from mcp.types import TextContent
-from opentelemetry import trace
 from pydantic import Field
 
 from mcp_instance import mcp
-from .utils import ToolResult, FSTECDataLoader
+from .utils import (
+    ToolResult,
+    FSTECDataLoader,
+    LazyTracer,
+    NoopSpan,
+    TRACING_ENABLED,
+    noop_notify,
+    progress_requested,
+)
+
+# OpenTelemetry tracer (импортируется при первом спане)
+tracer = LazyTracer(__name__)
 
-# OpenTelemetry tracer
-tracer = trace.get_tracer(__name__)
+# Загрузчик данных, выставляется сервером после init_data() —
+# обработчик тогда не дёргает get_instance() на каждый запрос
+_LOADER: Optional[FSTECDataLoader] = None
 
 
 @mcp.tool(
@@ -43,24 +57,35 @@ async def get_vulnerability_details(
         >>> result = await get_vulnerability_details("BDU:2024-12345", ctx)
         >>> print(result.content)
     """
-    with tracer.start_as_current_span("get_vulnerability_details") as span:
+    # Клиент без progressToken отбрасывает уведомления — не шлём их вовсе
+    if ctx is not None and progress_requested(ctx):
+        report_progress, info = ctx.report_progress, ctx.info
+    else:
+        report_progress = info = noop_notify
+
+    if TRACING_ENABLED:
+        span_cm = tracer.start_as_current_span("get_vulnerability_details")
+    else:
+        span_cm = contextlib.nullcontext(NoopSpan())
+
+    with span_cm as span:
         span.set_attribute("bdu_id", bdu_id)
         
-        await ctx.info(f"📋 Поиск уязвимости: {bdu_id}")
-        await ctx.report_progress(progress=0, total=100)
+        await info(f"📋 Поиск уязвимости: {bdu_id}")
+        await report_progress(progress=0, total=100)
         
         try:
             # Получаем данные из кеша
-            loader = FSTECDataLoader.get_instance()
-            await ctx.report_progress(progress=25, total=100)
+            loader = _LOADER or FSTECDataLoader.get_instance()
+            await report_progress(progress=25, total=100)
             
             # Ищем по ID
-            await ctx.info("🔍 Выполняем поиск по идентификатору...")
+            await info("🔍 Выполняем поиск по идентификатору...")
             vuln = loader.get_by_id(bdu_id)
-            await ctx.report_progress(progress=75, total=100)
+            await report_progress(progress=75, total=100)
             
             if vuln is None:
-                await ctx.info(f"⚠️ Уязвимость {bdu_id} не найдена")
+                await info(f"⚠️ Уязвимость {bdu_id} не найдена")
                 span.set_attribute("found", False)
                 
                 return ToolResult(
@@ -160,8 +185,8 @@ async def get_vulnerability_details(
 {details['other_ids']}
 """
             
-            await ctx.report_progress(progress=100, total=100)
-            await ctx.info(f"✅ Найдена уязвимость: {bdu_id}")
+            await report_progress(progress=100, total=100)
+            await info(f"✅ Найдена уязвимость: {bdu_id}")
             
             span.set_attribute("found", True)
             span.set_attribute("severity", details['severity'])
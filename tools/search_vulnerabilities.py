@@ -1,14 +1,43 @@
 """Инструмент поиска уязвимостей ФСТЭК по ключевым словам."""
+import contextlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
 from fastmcp import Context
 from mcp.types import TextContent
-from opentelemetry import trace
 from pydantic import Field
 
 from mcp_instance import mcp
-from .utils import ToolResult, FSTECDataLoader
+from .utils import (
+    ToolResult,
+    FSTECDataLoader,
+    LazyTracer,
+    NoopSpan,
+    TRACING_ENABLED,
+    noop_notify,
+    progress_requested,
+)
+
+# OpenTelemetry tracer (импортируется при первом спане)
+tracer = LazyTracer(__name__)
+
+# Загрузчик данных, выставляется сервером после init_data() —
+# обработчик тогда не дёргает get_instance() на каждый запрос
+_LOADER: Optional[FSTECDataLoader] = None
+
+# LRU-кеш готовых ответов: база статична в рамках запуска сервера,
+# а популярные запросы (nginx, apache и т.п.) повторяются
+_CACHE: "OrderedDict[Tuple[str, int], ToolResult]" = OrderedDict()
+_CACHE_SIZE = 256
 
-# OpenTelemetry tracer
-tracer = trace.get_tracer(__name__)
+
+def _cache_put(key: Tuple[str, int], result: ToolResult) -> ToolResult:
+    """Сохранение ответа в LRU-кеш с вытеснением самого старого."""
+    _CACHE[key] = result
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return result
 
 
 @mcp.tool(
@@ -54,64 +83,103 @@ async def search_vulnerabilities(
         >>> result = await search_vulnerabilities("Apache", 10, ctx)
         >>> print(result.content)
     """
-    with tracer.start_as_current_span("search_vulnerabilities") as span:
+    # Повторный запрос отдаём из кеша, не трогая ни поиск, ни трейсинг.
+    # Ключ — запрос как есть: ответ встраивает его в текст, и нормализация
+    # ключа отдавала бы клиенту чужое написание запроса
+    cache_key = (query, limit)
+    cached = _CACHE.get(cache_key)
+    if cached is not None:
+        _CACHE.move_to_end(cache_key)
+        return cached
+
+    # Клиент без progressToken отбрасывает уведомления — не шлём их вовсе
+    if ctx is not None and progress_requested(ctx):
+        report_progress, info = ctx.report_progress, ctx.info
+    else:
+        report_progress = info = noop_notify
+
+    if TRACING_ENABLED:
+        span_cm = tracer.start_as_current_span("search_vulnerabilities")
+    else:
+        span_cm = contextlib.nullcontext(NoopSpan())
+
+    with span_cm as span:
         span.set_attribute("query", query)
         span.set_attribute("limit", limit)
         
-        await ctx.info(f"🔍 Поиск уязвимостей по запросу: '{query}'")
-        await ctx.report_progress(progress=0, total=100)
+        await info(f"🔍 Поиск уязвимостей по запросу: '{query}'")
+        await report_progress(progress=0, total=100)
         
         try:
             # Получаем данные из кеша
-            loader = FSTECDataLoader.get_instance()
-            await ctx.report_progress(progress=25, total=100)
+            loader = _LOADER or FSTECDataLoader.get_instance()
+            await report_progress(progress=25, total=100)
             
             # Выполняем поиск
-            await ctx.info("📊 Выполняем поиск в базе данных...")
+            await info("📊 Выполняем поиск в базе данных...")
             results = loader.search(query, limit)
-            await ctx.report_progress(progress=75, total=100)
+            await report_progress(progress=75, total=100)
             
             if results.empty:
-                await ctx.info(f"⚠️ По запросу '{query}' ничего не найдено")
+                await info(f"⚠️ По запросу '{query}' ничего не найдено")
                 span.set_attribute("results_count", 0)
                 
-                return ToolResult(
+                return _cache_put(cache_key, ToolResult(
                     content=[TextContent(
                         type="text",
                         text=f"По запросу '{query}' ничего не найдено в базе ФСТЭК."
                     )],
                     structured_content={"query": query, "results": [], "count": 0},
                     meta={"query": query, "limit": limit}
-                )
+                ))
             
-            # Форматируем результаты
+            # Форматируем результаты колоночно, без iterrows
+            display = results[[
+                'Идентификатор',
+                'Наименование уязвимости',
+                'Уровень опасности уязвимости',
+                'Название ПО',
+                'Вендор ПО',
+            ]].astype(str)
+
+            # Усекаем длинные наименования одной векторной операцией
+            names = display['Наименование уязвимости'].to_numpy(dtype=str)
+            display['Наименование уязвимости'] = np.where(
+                np.char.str_len(names) > 100,
+                np.char.add(names.astype('U100'), '...'),
+                names,
+            )
+
             formatted_results = []
             text_lines = [f"🔍 Найдено уязвимостей по запросу '{query}': {len(results)}\n"]
-            
-            for idx, row in results.iterrows():
-                vuln_data = {
-                    "id": row['Идентификатор'],
-                    "name": row['Наименование уязвимости'][:100] + "..." if len(str(row['Наименование уязвимости'])) > 100 else row['Наименование уязвимости'],
-                    "severity": row['Уровень опасности уязвимости'],
-                    "software": row['Название ПО'],
-                    "vendor": row['Вендор ПО']
-                }
-                formatted_results.append(vuln_data)
-                
+
+            # itertuples отдаёт обычные кортежи — один проход по нужным
+            # колонкам без аллокации Series на каждую строку
+            for vid, name, severity, software, vendor in display.itertuples(
+                index=False, name=None
+            ):
+                formatted_results.append({
+                    "id": vid,
+                    "name": name,
+                    "severity": severity,
+                    "software": software,
+                    "vendor": vendor
+                })
+
                 text_lines.append(
-                    f"📌 **{vuln_data['id']}**\n"
-                    f"   Название: {vuln_data['name']}\n"
-                    f"   ПО: {vuln_data['vendor']} - {vuln_data['software']}\n"
-                    f"   Опасность: {vuln_data['severity']}\n"
+                    f"📌 **{vid}**\n"
+                    f"   Название: {name}\n"
+                    f"   ПО: {vendor} - {software}\n"
+                    f"   Опасность: {severity}\n"
                 )
             
-            await ctx.report_progress(progress=100, total=100)
-            await ctx.info(f"✅ Найдено {len(results)} уязвимостей")
+            await report_progress(progress=100, total=100)
+            await info(f"✅ Найдено {len(results)} уязвимостей")
             
             span.set_attribute("results_count", len(results))
             span.set_attribute("success", True)
             
-            return ToolResult(
+            return _cache_put(cache_key, ToolResult(
                 content=[TextContent(type="text", text="\n".join(text_lines))],
                 structured_content={
                     "query": query,
@@ -119,7 +187,7 @@ async def search_vulnerabilities(
                     "count": len(formatted_results)
                 },
                 meta={"query": query, "limit": limit}
-            )
+            ))
             
         except FileNotFoundError as e:
             span.set_attribute("error", "file_not_found")
@@ -1,11 +1,62 @@
 """Утилиты для MCP инструментов FSTEC."""
 import os
+import re
+from array import array
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 from mcp.types import TextContent
 
+# Регулярное выражение для выделения токенов при индексации
+_TOKEN_RE = re.compile(r"\w+")
+
+# Трейсинг опционален: спаны создаются только при FSTEC_TRACING=1,
+# иначе инструменты не платят за start_as_current_span на каждый вызов
+TRACING_ENABLED = os.getenv("FSTEC_TRACING") == "1"
+
+
+class NoopSpan:
+    """Заглушка спана для выключенного трейсинга."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+async def noop_notify(*args: Any, **kwargs: Any) -> None:
+    """Асинхронная заглушка вместо progress/info уведомлений."""
+    return None
+
+
+def progress_requested(ctx: Any) -> bool:
+    """Проверка, запросил ли клиент progress-уведомления (прислал progressToken)."""
+    try:
+        return ctx.request_context.meta.progressToken is not None
+    except AttributeError:
+        return False
+
+
+class LazyTracer:
+    """
+    Ленивый прокси OpenTelemetry-трейсера.
+
+    Откладывает импорт opentelemetry и get_tracer до первого создания
+    спана, чтобы модули инструментов не тянули его при импорте
+    (при выключенном трейсинге он не импортируется вовсе).
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._tracer = None
+
+    def start_as_current_span(self, *args: Any, **kwargs: Any):
+        if self._tracer is None:
+            from opentelemetry import trace
+            self._tracer = trace.get_tracer(self._name)
+        return self._tracer.start_as_current_span(*args, **kwargs)
+
 
 @dataclass
 class ToolResult:
@@ -43,9 +94,39 @@ def _require_env_vars(names: List[str]) -> Dict[str, str]:
 class FSTECDataLoader:
     """Загрузчик данных ФСТЭК из Excel файла."""
     
-    _instance: Optional['FSTECDataLoader'] = None
-    _df: Optional[pd.DataFrame] = None
-    
+    # Колонки с малым числом уникальных значений — храним как category,
+    # это в разы уменьшает память DataFrame
+    CATEGORICAL_COLUMNS = [
+        'Уровень опасности уязвимости',
+        'Тип ПО',
+        'Наименование ОС',
+        'Статус уязвимости',
+        'Вендор ПО',
+        'Название ПО',
+    ]
+
+    # Потолок для limit: не материализуем произвольно большие срезы
+    MAX_SEARCH_LIMIT = 100
+
+    # Колонки, по которым выполняется полнотекстовый поиск
+    SEARCH_COLUMNS = [
+        'Название ПО',
+        'Описание уязвимости',
+        'Наименование уязвимости',
+        'Вендор ПО',
+        'Версия ПО',
+    ]
+
+    def __init__(self) -> None:
+        # DataFrame с данными ФСТЭК (заполняется _load_data или напрямую в тестах)
+        self._df: Optional[pd.DataFrame] = None
+        # Инвертированный индекс токен -> номера строк (строится лениво)
+        self._postings: Optional[Dict[str, array]] = None
+        # Склеенный текст поисковых колонок в нижнем регистре (Series)
+        self._search_blob: Optional[pd.Series] = None
+        # Словарь идентификатор BDU -> номер строки для O(1) get_by_id
+        self._id_index: Optional[Dict[str, int]] = None
+
     # Маппинг колонок Excel файла
     COLUMN_MAPPING = {
         0: 'Идентификатор',
@@ -82,11 +163,8 @@ class FSTECDataLoader:
     
     @classmethod
     def get_instance(cls, file_path: str = "vullist.xlsx") -> 'FSTECDataLoader':
-        """Получить singleton экземпляр загрузчика."""
-        if cls._instance is None:
-            cls._instance = cls()
-            cls._instance._load_data(file_path)
-        return cls._instance
+        """Получить закешированный экземпляр загрузчика для файла."""
+        return _load_fstec(file_path)
     
     def _load_data(self, file_path: str) -> None:
         """
@@ -105,28 +183,129 @@ class FSTECDataLoader:
             )
         
         print(f"📂 Загрузка базы данных ФСТЭК из {file_path}...")
-        
-        # Читаем Excel, пропуская первые 3 строки заголовков
-        self._df = pd.read_excel(
-            file_path, 
-            engine='openpyxl', 
-            header=None, 
-            skiprows=3
-        )
-        
-        # Переименовываем колонки согласно маппингу
-        self._df.rename(columns=self.COLUMN_MAPPING, inplace=True)
-        
-        # Заменяем NaN на пустые строки
-        self._df.fillna("Нет данных", inplace=True)
-        
-        # Приводим все текстовые колонки к строкам
-        for col in self._df.columns:
-            if self._df[col].dtype == 'object':
-                self._df[col] = self._df[col].astype(str)
-        
+
+        # Parquet-кеш рядом с xlsx: повторные старты читают его через Arrow
+        # и не платят за парсинг Excel вообще
+        cache_path = file_path + ".parquet"
+        self._df = self._read_parquet_cache(cache_path, file_path)
+
+        if self._df is None:
+            # Читаем Excel, пропуская первые 3 строки заголовков.
+            # calamine (Rust) парсит xlsx в разы быстрее openpyxl
+            try:
+                self._df = pd.read_excel(
+                    file_path,
+                    engine='calamine',
+                    header=None,
+                    skiprows=3
+                )
+            except ImportError:
+                self._df = pd.read_excel(
+                    file_path,
+                    engine='openpyxl',
+                    header=None,
+                    skiprows=3
+                )
+
+            # Переименовываем колонки согласно маппингу
+            self._df.rename(columns=self.COLUMN_MAPPING, inplace=True)
+
+            # Имена колонок приводим к строкам: за пределами маппинга могут
+            # остаться числовые, а parquet не сохраняет смешанные имена
+            self._df.columns = self._df.columns.map(str)
+
+            # Заменяем NaN на заглушку; через astype(object), потому что
+            # pandas 3 запрещает fillna строкой в числовых колонках
+            self._df = self._df.astype(object).fillna("Нет данных")
+
+            # Приводим все текстовые колонки к строкам
+            for col in self._df.columns:
+                if self._df[col].dtype == 'object':
+                    self._df[col] = self._df[col].astype(str)
+
+            # Повторяющиеся значения храним кодами вместо строк
+            for col in self.CATEGORICAL_COLUMNS:
+                self._df[col] = self._df[col].astype('category')
+
+            # Сохраняем обработанный DataFrame в кеш (pyarrow опционален)
+            try:
+                self._df.to_parquet(cache_path)
+            except (ImportError, OSError):
+                pass
+
         print(f"✅ Загружено {len(self._df)} записей об уязвимостях")
-    
+
+        # Строим индексы сразу, чтобы первый запрос не платил за это
+        self._build_search_index()
+        self._build_id_index()
+
+    def _build_id_index(self) -> None:
+        """Построение словаря идентификатор BDU -> номер строки."""
+        df = self.dataframe
+        self._id_index = dict(
+            zip(df['Идентификатор'].to_numpy(), range(len(df)))
+        )
+
+    @staticmethod
+    def _read_parquet_cache(cache_path: str, file_path: str) -> Optional[pd.DataFrame]:
+        """
+        Чтение parquet-кеша, если он актуальнее исходного xlsx.
+
+        Returns:
+            DataFrame из кеша или None, если кеш отсутствует/устарел/не читается
+        """
+        if not os.path.exists(cache_path):
+            return None
+        if os.path.getmtime(cache_path) < os.path.getmtime(file_path):
+            return None
+        try:
+            return pd.read_parquet(cache_path)
+        except (ImportError, OSError):
+            return None
+
+    def _build_search_index(self) -> None:
+        """
+        Построение инвертированного индекса токен -> номера строк.
+
+        Один проход по поисковым колонкам: каждая ячейка приводится к нижнему
+        регистру и разбивается на токены (по пробелам и по \\w+), для каждого
+        токена сохраняется массив номеров строк. Поиск по индексу сводится
+        к пересечению небольших множеств вместо сканирования всего DataFrame.
+        """
+        df = self.dataframe
+        postings: Dict[str, array] = {}
+        columns = [df[col].to_numpy() for col in self.SEARCH_COLUMNS]
+
+        # Кешируем склеенный текст поисковых колонок в нижнем регистре.
+        # Храним как Series: фиксированная ширина numpy-массива на реальной
+        # базе (строки до ~34К символов) раздувается до десятков ГиБ
+        blob = df[self.SEARCH_COLUMNS[0]].astype(str)
+        for col in self.SEARCH_COLUMNS[1:]:
+            blob = blob + '␟' + df[col].astype(str)
+        self._search_blob = blob.str.lower().reset_index(drop=True)
+
+        for row_id in range(len(df)):
+            tokens = set()
+            for col_values in columns:
+                text = str(col_values[row_id]).lower()
+                tokens.update(text.split())
+                tokens.update(_TOKEN_RE.findall(text))
+            for token in tokens:
+                postings.setdefault(token, array('i')).append(row_id)
+
+        self._postings = postings
+
+    def warmup(self) -> None:
+        """
+        Прогрев всех ленивых структур после загрузки.
+
+        Выполняет холостой поиск и выборку по идентификатору, чтобы первый
+        реальный запрос не платил за построение индексов и кешей.
+        """
+        self.search("warmup", limit=1)
+        if self._id_index:
+            self.get_by_id(next(iter(self._id_index)))
+
     @property
     def dataframe(self) -> pd.DataFrame:
         """Получить DataFrame с данными."""
@@ -147,39 +326,59 @@ class FSTECDataLoader:
         Returns:
             DataFrame с найденными записями
         """
-        df = self.dataframe
-        # Разбиваем запрос на слова для поиска "AND" логикой
+        # Разбиваем запрос на слова для поиска "AND" логикой;
+        # пустой/пробельный запрос отсекаем до любых обращений к данным
         query_parts = query.lower().split()
-        
         if not query_parts:
-            return df.head(0)
-            
-        # Колонки, по которым ищем
-        search_columns = [
-            'Название ПО',
-            'Описание уязвимости', 
-            'Наименование уязвимости',
-            'Вендор ПО',
-            'Версия ПО'  # Добавляем версию для поиска
-        ]
-        
-        # Начинаем с маски, где все True
-        final_mask = pd.Series([True] * len(df), index=df.index)
-        
-        # Для каждого слова из запроса
+            return self.dataframe.head(0)
+
+        df = self.dataframe
+        # Ограничиваем limit разумными рамками
+        limit = max(1, min(limit, self.MAX_SEARCH_LIMIT))
+
+        # Индекс строится лениво, если DataFrame был задан напрямую (тесты)
+        if self._postings is None:
+            self._build_search_index()
+
+        # Для каждого слова запроса собираем множество подходящих строк
+        row_sets: List[set] = []
         for part in query_parts:
-            # Маска для текущего слова (должно быть хотя бы в одной колонке)
-            part_mask = pd.Series([False] * len(df), index=df.index)
-            
-            for col in search_columns:
-                # Используем regex=False для безопасного поиска спецсимволов (точки в версиях и т.д.)
-                part_mask |= df[col].str.lower().str.contains(part, regex=False, na=False)
-            
-            # Обновляем общую маску (логическое И)
-            final_mask &= part_mask
-        
-        results = df[final_mask].head(limit)
-        return results
+            if _TOKEN_RE.fullmatch(part):
+                posting = self._postings.get(part)
+                if posting is not None:
+                    # Слово есть в индексе — берём готовый список строк
+                    row_sets.append(set(posting))
+                else:
+                    # Фрагмент слова — откатываемся на подстрочный поиск
+                    row_sets.append(self._substring_scan(part))
+            else:
+                # Токены с пунктуацией (версии "1.5.6", списки "1.5.6, 1.5.7")
+                # всегда ищем подстрокой: индекс не видит вхождения вида
+                # "1.5.6," и молча терял такие строки. Подстрочный поиск —
+                # надмножество индексных попаданий, объединять не нужно
+                row_sets.append(self._substring_scan(part))
+
+        # Пересекаем от меньшего множества к большему
+        row_sets.sort(key=len)
+        matched = set.intersection(*row_sets)
+
+        if not matched:
+            return df.head(0)
+
+        # Сортируем, чтобы сохранить исходный порядок строк
+        return df.take(sorted(matched)[:limit])
+
+    def _substring_scan(self, part: str) -> set:
+        """
+        Подстрочный поиск слова по всем поисковым колонкам.
+
+        Используется только для токенов, отсутствующих в индексе
+        (например, фрагментов слов). Возвращает множество номеров строк.
+        """
+        # Один .str.contains по кешированной Series вместо
+        # per-column .str.lower().str.contains на каждый запрос
+        mask = self._search_blob.str.contains(part, regex=False, na=False)
+        return set(np.flatnonzero(mask.to_numpy()))
     
     def get_by_id(self, bdu_id: str) -> Optional[pd.Series]:
         """
@@ -192,10 +391,26 @@ class FSTECDataLoader:
             Series с данными уязвимости или None
         """
         df = self.dataframe
-        mask = df['Идентификатор'] == bdu_id
-        results = df[mask]
-        
-        if results.empty:
+        # Индекс строится лениво, если DataFrame был задан напрямую (тесты)
+        if self._id_index is None:
+            self._build_id_index()
+
+        idx = self._id_index.get(bdu_id)
+        if idx is None:
             return None
-        
-        return results.iloc[0]
+
+        return df.iloc[idx]
+
+
+@lru_cache(maxsize=4)
+def _load_fstec(file_path: str) -> FSTECDataLoader:
+    """
+    Загрузка данных ФСТЭК с кешированием по пути к файлу.
+
+    lru_cache заменяет ручной singleton на _instance/_df: кеширование
+    потокобезопасно, а тесты сбрасывают состояние через
+    _load_fstec.cache_clear(). Ошибки загрузки не кешируются.
+    """
+    loader = FSTECDataLoader()
+    loader._load_data(file_path)
+    return loader